@@ -1,154 +1,199 @@
+import bisect
+import heapq
+import mmap
+import os
 import re
+import stat
 import sys
-from statistics import mean, median
+from statistics import fmean, median
+
+# Patterns with optional sequence numbers and ISO timestamp prefix (bytes, so the
+# mapped log is scanned without decoding)
+_DISPATCH_RE = re.compile(rb'DISPATCHING BEAT UPDATE: ([\d.]+) at time ([\d.]+)s.*?DispatchTime=(\d+)(?:, Seq=(\d+))?')
+_RENDER_RE = re.compile(rb'\[Cursor Render\] Beat=([\d.]+), RenderTime=(\d+)(?:, Seq=(\d+))?')
 
 def parse_cursor_logs(file_path):
+    # Collect the whole report and write it in one go rather than one print per line
+    out = []
     try:
-        with open(file_path, 'r') as f:
-            content = f.read()
+        _report_cursor_lag(file_path, out)
+    finally:
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+
+def _parse_events(buf):
+    """Extract dispatch and render events from a bytes-like log buffer"""
+    # Convert captured fields once here so the matchers never re-parse them
+    dispatches = [(float(beat), float(audio_time), int(dispatch_time), int(seq) if seq else None)
+                  for beat, audio_time, dispatch_time, seq in _DISPATCH_RE.findall(buf)]
+    renders = [(float(beat), int(render_time), int(seq) if seq else None)
+               for beat, render_time, seq in _RENDER_RE.findall(buf)]
+    return dispatches, renders
+
+def _report_cursor_lag(file_path, out):
+    try:
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            # Only regular, non-empty files can be mapped; pipes, devices
+            # (e.g. <(cat logs.txt), /dev/stdin) and empty files are read whole
+            if stat.S_ISREG(st.st_mode) and st.st_size:
+                # The log is scanned front to back; let the kernel read ahead
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    dispatches, renders = _parse_events(mm)
+            else:
+                dispatches, renders = _parse_events(f.read())
     except FileNotFoundError:
-        print(f"File not found: {file_path}")
+        out.append(f"File not found: {file_path}")
         return
     
-    # Patterns with optional sequence numbers and ISO timestamp prefix
-    dispatch_pattern = r'DISPATCHING BEAT UPDATE: ([\d.]+) at time ([\d.]+)s.*?DispatchTime=(\d+)(?:, Seq=(\d+))?'
-    render_pattern = r'\[Cursor Render\] Beat=([\d.]+), RenderTime=(\d+)(?:, Seq=(\d+))?'
-    
-    print(f"Searching for patterns in log file...")
-    print(f"Sample dispatch pattern: DISPATCHING BEAT UPDATE: 1.0 at time 0.500s, DispatchTime=1234567890")
-    print(f"Sample render pattern: [Cursor Render] Beat=1.0, RenderTime=1234567890")
+    out.append(f"Searching for patterns in log file...")
+    out.append(f"Sample dispatch pattern: DISPATCHING BEAT UPDATE: 1.0 at time 0.500s, DispatchTime=1234567890")
+    out.append(f"Sample render pattern: [Cursor Render] Beat=1.0, RenderTime=1234567890")
     
-    dispatches = re.findall(dispatch_pattern, content)
-    renders = re.findall(render_pattern, content)
-    
-    print("="*70)
-    print(f"Analysis of Cursor Lag")
-    print("="*70)
-    print(f"Total Dispatch Events: {len(dispatches)}")
-    print(f"Total Render Events: {len(renders)}")
+    out.append("="*70)
+    out.append(f"Analysis of Cursor Lag")
+    out.append("="*70)
+    out.append(f"Total Dispatch Events: {len(dispatches)}")
+    out.append(f"Total Render Events: {len(renders)}")
     
     if not dispatches:
-        print("\n❌ No dispatch events found in logs!")
+        out.append("\n❌ No dispatch events found in logs!")
         return
     
     if not renders:
-        print("\n❌ No render events found in logs!")
+        out.append("\n❌ No render events found in logs!")
         return
     
     # Check if we have sequence numbers
-    has_seq = dispatches[0][3] != '' if len(dispatches[0]) > 3 else False
+    has_seq = dispatches[0][3] is not None
     
     if has_seq:
-        print("✅ Sequence numbers detected - using precise matching")
+        out.append("✅ Sequence numbers detected - using precise matching")
         lags, matched_beats, unmatched = match_by_sequence(dispatches, renders)
     else:
-        print("⚠️  No sequence numbers - using IMPROVED timestamp-based matching")
-        print("   (Add Seq logging for more accurate analysis)")
+        out.append("⚠️  No sequence numbers - using IMPROVED timestamp-based matching")
+        out.append("   (Add Seq logging for more accurate analysis)")
+        out.append(f"\nImproved matching strategy:")
+        out.append(f"  - For each dispatch, find the NEAREST render that occurs AFTER dispatch")
+        out.append(f"  - Within 200ms time window (configurable)")
+        out.append(f"  - Allows slight beat value differences")
         lags, matched_beats, unmatched = match_by_timestamp_improved(dispatches, renders)
     
     if not lags:
-        print("\n❌ No matching dispatch-render pairs found!")
-        print("\n🔍 DEBUG INFO:")
-        print(f"First 5 dispatches: {dispatches[:5]}")
-        print(f"First 5 renders: {renders[:5]}")
+        out.append("\n❌ No matching dispatch-render pairs found!")
+        out.append("\n🔍 DEBUG INFO:")
+        out.append(f"First 5 dispatches: {dispatches[:5]}")
+        out.append(f"First 5 renders: {renders[:5]}")
         return
     
     # Statistics
-    print(f"\n📊 LAG STATISTICS (Dispatch → Render)")
-    print("-"*70)
-    print(f"Matched Beat Updates: {len(lags)}")
-    print(f"Unmatched Dispatches: {len(unmatched)}")
-    print(f"Best Response Time: {min(lags):.0f}ms")
-    print(f"Average Lag: {mean(lags):.1f}ms")
-    print(f"Median Lag: {median(lags):.1f}ms")
-    print(f"Worst Lag: {max(lags):.0f}ms")
-    
-    # Performance categorization
-    excellent = sum(1 for lag in lags if 0 <= lag < 16)
-    good = sum(1 for lag in lags if 16 <= lag < 50)
-    acceptable = sum(1 for lag in lags if 50 <= lag < 100)
-    poor = sum(1 for lag in lags if lag >= 100)
-    negative = sum(1 for lag in lags if lag < 0)
-    
-    print(f"\n⚡ PERFORMANCE BREAKDOWN:")
-    print("-"*70)
-    print(f"Excellent (<16ms):     {excellent:3d}/{len(lags)} ({excellent/len(lags)*100:5.1f}%)")
-    print(f"Good (16-50ms):        {good:3d}/{len(lags)} ({good/len(lags)*100:5.1f}%)")
-    print(f"Acceptable (50-100ms): {acceptable:3d}/{len(lags)} ({acceptable/len(lags)*100:5.1f}%)")
-    print(f"Poor (>100ms):         {poor:3d}/{len(lags)} ({poor/len(lags)*100:5.1f}%)")
+    out.append(f"\n📊 LAG STATISTICS (Dispatch → Render)")
+    out.append("-"*70)
+    out.append(f"Matched Beat Updates: {len(lags)}")
+    out.append(f"Unmatched Dispatches: {len(unmatched)}")
+    out.append(f"Best Response Time: {min(lags):.0f}ms")
+    out.append(f"Average Lag: {fmean(lags):.1f}ms")
+    out.append(f"Median Lag: {median(lags):.1f}ms")
+    out.append(f"Worst Lag: {max(lags):.0f}ms")
+    
+    # Performance categorization (single pass over lags)
+    excellent = good = acceptable = poor = negative = 0
+    for lag in lags:
+        if lag < 0:
+            negative += 1
+        elif lag < 16:
+            excellent += 1
+        elif lag < 50:
+            good += 1
+        elif lag < 100:
+            acceptable += 1
+        else:
+            poor += 1
+    
+    out.append(f"\n⚡ PERFORMANCE BREAKDOWN:")
+    out.append("-"*70)
+    out.append(f"Excellent (<16ms):     {excellent:3d}/{len(lags)} ({excellent/len(lags)*100:5.1f}%)")
+    out.append(f"Good (16-50ms):        {good:3d}/{len(lags)} ({good/len(lags)*100:5.1f}%)")
+    out.append(f"Acceptable (50-100ms): {acceptable:3d}/{len(lags)} ({acceptable/len(lags)*100:5.1f}%)")
+    out.append(f"Poor (>100ms):         {poor:3d}/{len(lags)} ({poor/len(lags)*100:5.1f}%)")
     if negative > 0:
-        print(f"⚠️  NEGATIVE (bug):     {negative:3d}/{len(lags)} ({negative/len(lags)*100:5.1f}%)")
+        out.append(f"⚠️  NEGATIVE (bug):     {negative:3d}/{len(lags)} ({negative/len(lags)*100:5.1f}%)")
     
     # Show worst offenders
-    print(f"\n⚠️  WORST LAG EVENTS:")
-    print("-"*70)
+    out.append(f"\n⚠️  WORST LAG EVENTS:")
+    out.append("-"*70)
     positive_matched = [m for m in matched_beats if m[3] >= 0]
     if positive_matched:
-        worst = sorted(positive_matched, key=lambda x: x[3], reverse=True)[:10]
+        worst = heapq.nlargest(10, positive_matched, key=lambda x: x[3])
         for beat, d_time, r_time, lag in worst:
-            print(f"Beat {beat:6.2f}: {lag:4.0f}ms lag (Dispatch: {d_time}, Render: {r_time})")
+            out.append(f"Beat {beat:6.2f}: {lag:4.0f}ms lag (Dispatch: {d_time}, Render: {r_time})")
     
     # Show best performers
-    print(f"\n✅ BEST LAG EVENTS:")
-    print("-"*70)
-    best = sorted(positive_matched, key=lambda x: x[3])[:10] if positive_matched else []
+    out.append(f"\n✅ BEST LAG EVENTS:")
+    out.append("-"*70)
+    best = heapq.nsmallest(10, positive_matched, key=lambda x: x[3])
     for beat, d_time, r_time, lag in best:
-        print(f"Beat {beat:6.2f}: {lag:4.0f}ms lag (Dispatch: {d_time}, Render: {r_time})")
+        out.append(f"Beat {beat:6.2f}: {lag:4.0f}ms lag (Dispatch: {d_time}, Render: {r_time})")
     
     if negative > 0:
-        print(f"\n❌ NEGATIVE LAG EVENTS (Matching Errors):")
-        print("-"*70)
+        out.append(f"\n❌ NEGATIVE LAG EVENTS (Matching Errors):")
+        out.append("-"*70)
         neg_matched = [m for m in matched_beats if m[3] < 0]
-        for beat, d_time, r_time, lag in sorted(neg_matched, key=lambda x: x[3])[:10]:
-            print(f"Beat {beat:6.2f}: {lag:4.0f}ms (Render BEFORE Dispatch!)")
+        for beat, d_time, r_time, lag in heapq.nsmallest(10, neg_matched, key=lambda x: x[3]):
+            out.append(f"Beat {beat:6.2f}: {lag:4.0f}ms (Render BEFORE Dispatch!)")
     
     if unmatched:
-        print(f"\n⚠️  UNMATCHED DISPATCHES ({len(unmatched)} total):")
-        print("-"*70)
-        print("These dispatches had no corresponding render:")
+        out.append(f"\n⚠️  UNMATCHED DISPATCHES ({len(unmatched)} total):")
+        out.append("-"*70)
+        out.append("These dispatches had no corresponding render:")
         for beat, d_time in unmatched[:10]:
-            print(f"   Beat {beat:6.2f} dispatched at {d_time}")
+            out.append(f"   Beat {beat:6.2f} dispatched at {d_time}")
         if len(unmatched) > 10:
-            print(f"   ... and {len(unmatched) - 10} more")
+            out.append(f"   ... and {len(unmatched) - 10} more")
     
     # Diagnosis
-    print(f"\n🔍 DIAGNOSIS:")
-    print("-"*70)
-    avg_lag = mean([l for l in lags if l >= 0]) if any(l >= 0 for l in lags) else mean(lags)
+    out.append(f"\n🔍 DIAGNOSIS:")
+    out.append("-"*70)
+    non_negative_lags = [l for l in lags if l >= 0]
+    avg_lag = fmean(non_negative_lags) if non_negative_lags else fmean(lags)
     
     if len(unmatched) > len(lags):
-        print(f"❌ More unmatched dispatches ({len(unmatched)}) than matched ({len(lags)})!")
-        print("   Possible causes:")
-        print("   1. Cursor is using movedBeats.current instead of target beat in logging")
-        print("   2. Multiple dispatches before single render (batching)")
-        print("   3. Renders are happening but beat values don't match")
-        print(f"\n   → Check your logging in moveCursorByBeatsDirectJump()")
-        print(f"   → Should log TARGET beat, not movedBeats.current")
+        out.append(f"❌ More unmatched dispatches ({len(unmatched)}) than matched ({len(lags)})!")
+        out.append("   Possible causes:")
+        out.append("   1. Cursor is using movedBeats.current instead of target beat in logging")
+        out.append("   2. Multiple dispatches before single render (batching)")
+        out.append("   3. Renders are happening but beat values don't match")
+        out.append(f"\n   → Check your logging in moveCursorByBeatsDirectJump()")
+        out.append(f"   → Should log TARGET beat, not movedBeats.current")
     
     if negative > 0:
-        print(f"❌ {negative} negative lags detected!")
+        out.append(f"❌ {negative} negative lags detected!")
         if not has_seq:
-            print("   → Likely cause: Incorrect beat matching without sequence numbers")
-            print("   → Solution: Add Seq logging to both dispatch and render")
+            out.append("   → Likely cause: Incorrect beat matching without sequence numbers")
+            out.append("   → Solution: Add Seq logging to both dispatch and render")
         else:
-            print("   → This shouldn't happen with sequence numbers - check your logging!")
+            out.append("   → This shouldn't happen with sequence numbers - check your logging!")
     
     if avg_lag < 50:
-        print("✅ Average performance is good!")
+        out.append("✅ Average performance is good!")
     elif avg_lag < 100:
-        print("⚠️  Noticeable lag exists. Consider optimizations.")
+        out.append("⚠️  Noticeable lag exists. Consider optimizations.")
     else:
-        print("❌ Significant lag detected. Immediate action needed!")
+        out.append("❌ Significant lag detected. Immediate action needed!")
     
     if poor > len(lags) * 0.1:
-        print(f"❌ {poor/len(lags)*100:.1f}% of updates have >100ms lag")
-        print("   → This is very noticeable to users")
+        out.append(f"❌ {poor/len(lags)*100:.1f}% of updates have >100ms lag")
+        out.append("   → This is very noticeable to users")
     
     if excellent < len(lags) * 0.5:
-        print("⚠️  Less than 50% of updates are frame-perfect (<16ms)")
-        print("   → React state update chain is likely causing delays")
-        print("   → Solution: Remove useEffect chain in ScoreDisplay.tsx")
-        print("   → Consolidate into single useEffect that directly responds to state.estimatedBeat")
+        out.append("⚠️  Less than 50% of updates are frame-perfect (<16ms)")
+        out.append("   → React state update chain is likely causing delays")
+        out.append("   → Solution: Remove useEffect chain in ScoreDisplay.tsx")
+        out.append("   → Consolidate into single useEffect that directly responds to state.estimatedBeat")
 
 def match_by_sequence(dispatches, renders):
     """Match events using sequence numbers (most accurate)"""
@@ -161,27 +206,27 @@ def match_by_sequence(dispatches, renders):
     render_by_seq = {}
     
     for beat, audio_time, dispatch_time, seq in dispatches:
-        if seq:
-            dispatch_by_seq[int(seq)] = (float(beat), int(dispatch_time), float(audio_time))
+        if seq is not None:
+            dispatch_by_seq[seq] = (beat, dispatch_time, audio_time)
     
     for beat, render_time, seq in renders:
-        if seq:
-            render_by_seq[int(seq)] = (float(beat), int(render_time))
+        if seq is not None:
+            render_by_seq[seq] = (beat, render_time)
     
     # Match by sequence number
-    for seq in sorted(dispatch_by_seq.keys()):
-        if seq in render_by_seq:
-            d_beat, d_time, audio_time = dispatch_by_seq[seq]
-            r_beat, r_time = render_by_seq[seq]
-            
-            # Verify beats match
-            if abs(d_beat - r_beat) < 0.01:
-                lag = r_time - d_time
-                lags.append(lag)
-                matched_beats.append((d_beat, d_time, r_time, lag))
-        else:
-            d_beat, d_time, _ = dispatch_by_seq[seq]
-            unmatched.append((d_beat, d_time))
+    for seq in sorted(dispatch_by_seq.keys() & render_by_seq.keys()):
+        d_beat, d_time, audio_time = dispatch_by_seq[seq]
+        r_beat, r_time = render_by_seq[seq]
+        
+        # Verify beats match
+        if abs(d_beat - r_beat) < 0.01:
+            lag = r_time - d_time
+            lags.append(lag)
+            matched_beats.append((d_beat, d_time, r_time, lag))
+    
+    for seq in sorted(dispatch_by_seq.keys() - render_by_seq.keys()):
+        d_beat, d_time, _ = dispatch_by_seq[seq]
+        unmatched.append((d_beat, d_time))
     
     return lags, matched_beats, unmatched
 
@@ -196,44 +241,41 @@ def match_by_timestamp_improved(dispatches, renders):
     dispatch_events = []
     render_events = []
     
-    for beat, audio_time, dispatch_time, *_ in dispatches:
-        dispatch_events.append((int(dispatch_time), float(beat), float(audio_time)))
+    for beat, audio_time, dispatch_time, _ in dispatches:
+        dispatch_events.append((dispatch_time, beat, audio_time))
     
-    for beat, render_time, *_ in renders:
-        render_events.append((int(render_time), float(beat)))
+    for beat, render_time, _ in renders:
+        render_events.append((render_time, beat))
     
     # Sort by timestamp
     dispatch_events.sort()
     render_events.sort()
     
-    print(f"\nImproved matching strategy:")
-    print(f"  - For each dispatch, find the NEAREST render that occurs AFTER dispatch")
-    print(f"  - Within 200ms time window (configurable)")
-    print(f"  - Allows slight beat value differences")
-    
     lags = []
     matched_beats = []
     unmatched = []
-    used_renders = set()
+    used_renders = bytearray(len(render_events))  # 1 = render already matched
     
     MAX_TIME_WINDOW_MS = 200  # Maximum time between dispatch and render
     
+    render_times = [r_time for r_time, _ in render_events]
+    
     # For each dispatch, find the nearest subsequent render
     for d_time, d_beat, audio_time in dispatch_events:
         best_match = None
         best_score = float('inf')
         
-        for i, (r_time, r_beat) in enumerate(render_events):
-            if i in used_renders:
-                continue
+        # Must occur after dispatch: jump straight to the first such render
+        start = bisect.bisect_left(render_times, d_time)
+        for i in range(start, len(render_events)):
+            r_time, r_beat = render_events[i]
             
-            # Must occur after dispatch
-            if r_time < d_time:
-                continue
-            
-            # Must be within time window
+            # Must be within time window; renders are time-sorted, so stop here
             time_diff = r_time - d_time
             if time_diff > MAX_TIME_WINDOW_MS:
+                break
+            
+            if used_renders[i]:
                 continue
             
             # Calculate matching score (prefer exact beat match and minimal time)
@@ -248,7 +290,7 @@ def match_by_timestamp_improved(dispatches, renders):
         
         if best_match:
             idx, r_time, r_beat, lag = best_match
-            used_renders.add(idx)
+            used_renders[idx] = 1
             lags.append(lag)
             matched_beats.append((d_beat, d_time, r_time, lag))
         else:
@@ -1,29 +1,45 @@
+import mmap
+import os
 import re
+import stat
+import sys
+from collections import defaultdict
 
-dispatch_re = re.compile(r"DISPATCHING BEAT UPDATE: (\d+) .*DispatchTime=(\d+)")
-render_re = re.compile(r"\[Cursor Render\] Beat=(\d+), RenderTime=(\d+)")
+dispatch_re = re.compile(rb"DISPATCHING BEAT UPDATE: (\d+) .*DispatchTime=(\d+)")
+render_re = re.compile(rb"\[Cursor Render\] Beat=(\d+), RenderTime=(\d+)")
 
-dispatch_times = {}
-render_times = {}
+dispatch_times = defaultdict(list)
+render_times = defaultdict(list)
 
-with open("logs.txt") as f:
-    for line in f:
-        d = dispatch_re.search(line)
-        if d:
-            beat = int(d.group(1))
-            t = int(d.group(2))
-            dispatch_times.setdefault(beat, []).append(t)
-        r = render_re.search(line)
-        if r:
-            beat = int(r.group(1))
-            t = int(r.group(2))
-            render_times.setdefault(beat, []).append(t)
+def collect_events(buf):
+    # int() parses the captured bytes directly
+    for beat, t in dispatch_re.findall(buf):
+        dispatch_times[int(beat)].append(int(t))
+    for beat, t in render_re.findall(buf):
+        render_times[int(beat)].append(int(t))
 
-print("Beat\tDispatchTime\tRenderTime\tLag(ms)")
+with open("logs.txt", "rb") as f:
+    st = os.fstat(f.fileno())
+    # Only regular, non-empty files can be mapped; a FIFO, device or empty
+    # logs.txt is read whole instead
+    if stat.S_ISREG(st.st_mode) and st.st_size:
+        # Single front-to-back scan; let the kernel read ahead in large chunks
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            collect_events(mm)
+    else:
+        collect_events(f.read())
+
+# Build every row first and write the table in one call
+rows = ["Beat\tDispatchTime\tRenderTime\tLag(ms)"]
 for beat in sorted(dispatch_times):
     d_list = dispatch_times[beat]
     r_list = render_times.get(beat, [])
     for i, d_time in enumerate(d_list):
         r_time = r_list[i] if i < len(r_list) else None
         lag = (r_time - d_time) if r_time else None
-        print(f"{beat}\t{d_time}\t{r_time}\t{lag}")
\ No newline at end of file
+        rows.append(f"{beat}\t{d_time}\t{r_time}\t{lag}")
+sys.stdout.write("\n".join(rows) + "\n")